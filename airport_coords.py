@@ -0,0 +1,42 @@
+# airport_coords.py
+
+"""
+Ce fichier agit en tant que table de coordonnées (latitude, longitude) des aéroports les plus utilisés, afin de calculer
+les distances sans interroger l'API OpenCage. Les aéroports absents de la table sont géocodés puis mis en cache par FlightScanner
+"""
+
+airport_coords = {
+    'CDG': (49.0097, 2.5479),  # Paris Charles de Gaulle (France)
+    'ORY': (48.7262, 2.3652),  # Paris Orly (France)
+    'BVA': (49.4544, 2.1128),  # Paris Beauvais (France)
+    'LYS': (45.7256, 5.0811),  # Lyon Saint-Exupéry (France)
+    'MRS': (43.4393, 5.2214),  # Marseille Provence (France)
+    'NCE': (43.6584, 7.2159),  # Nice Côte d'Azur (France)
+    'TLS': (43.6291, 1.3638),  # Toulouse Blagnac (France)
+    'BOD': (44.8283, -0.7156),  # Bordeaux Mérignac (France)
+    'NTE': (47.1532, -1.6107),  # Nantes Atlantique (France)
+    'LIL': (50.5619, 3.0894),  # Lille Lesquin (France)
+    'MPL': (43.5762, 3.9630),  # Montpellier Méditerranée (France)
+    'ALG': (36.6910, 3.2154),  # Alger Houari Boumediene (Algérie)
+    'ORN': (35.6239, -0.6212),  # Oran Ahmed Ben Bella (Algérie)
+    'CZL': (36.2760, 6.6204),  # Constantine Mohamed Boudiaf (Algérie)
+    'AAE': (36.8222, 7.8092),  # Annaba Rabah Bitat (Algérie)
+    'TLM': (35.0167, -1.4500),  # Tlemcen Zenata (Algérie)
+    'TUN': (36.8510, 10.2272),  # Tunis Carthage (Tunisie)
+    'CMN': (33.3675, -7.5898),  # Casablanca Mohammed V (Maroc)
+    'RAK': (31.6069, -8.0363),  # Marrakech Menara (Maroc)
+    'CAI': (30.1219, 31.4056),  # Le Caire (Égypte)
+    'LHR': (51.4700, -0.4543),  # Londres Heathrow (Royaume-Uni)
+    'FRA': (50.0379, 8.5622),  # Francfort (Allemagne)
+    'MUC': (48.3537, 11.7750),  # Munich (Allemagne)
+    'AMS': (52.3105, 4.7683),  # Amsterdam Schiphol (Pays-Bas)
+    'BRU': (50.9010, 4.4856),  # Bruxelles (Belgique)
+    'GVA': (46.2381, 6.1090),  # Genève (Suisse)
+    'MAD': (40.4983, -3.5676),  # Madrid Barajas (Espagne)
+    'BCN': (41.2974, 2.0833),  # Barcelone El Prat (Espagne)
+    'LIS': (38.7742, -9.1342),  # Lisbonne Humberto Delgado (Portugal)
+    'FCO': (41.8003, 12.2389),  # Rome Fiumicino (Italie)
+    'IST': (41.2753, 28.7519),  # Istanbul (Turquie)
+    'DXB': (25.2532, 55.3657),  # Dubaï (Émirats arabes unis)
+    'JFK': (40.6413, -73.7781),  # New York John F. Kennedy (États-Unis)
+}
@@ -8,24 +8,151 @@
 # flight_scanner.py
 
 
+import sys
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.error import URLError
 import time
-import matplotlib.pyplot as plt
 import numpy as np
-from statistics import median
 from airline_codes import airline_codes
+from airport_coords import airport_coords
 from amadeus import Client, ResponseError
-from collections import defaultdict
-from datetime import datetime
-import re
-import folium
-from geopy.geocoders import Nominatim
+from collections import OrderedDict
 import math
-from geopy.distance import geodesic
 import json
+import os
+import sqlite3
+import hashlib
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from numba import njit
+except ImportError:  # numba est optionnel, utilisé seulement pour les très gros lots de routes
+    njit = None
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel, on se rabat sur le décodeur de requests
+    orjson = None
+
+
+EARTH_RADIUS_KM = 6371.0088
+JIT_BATCH_THRESHOLD = 10000
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+_SAKAMOTO_OFFSETS = (0, 3, 2, 5, 0, 3, 5, 1, 4, 6, 2, 4)
+FUEL_PRICE_DTYPE = np.dtype([('date', 'datetime64[D]'), ('price', 'f4')])
+
+if njit is not None:
+    @njit(fastmath=True, cache=True)
+    def _haversine_km_jit(lat1, lon1, lat2, lon2):
+        out = np.empty(lat1.shape[0])
+        for i in range(lat1.shape[0]):
+            phi1 = math.radians(lat1[i])
+            phi2 = math.radians(lat2[i])
+            dphi = phi2 - phi1
+            dlmb = math.radians(lon2[i] - lon1[i])
+            a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+            out[i] = 2 * EARTH_RADIUS_KM * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        return out
+
+    @njit(cache=True)
+    def _group_mean(keys, values, n_groups):
+        sums = np.zeros(n_groups)
+        counts = np.zeros(n_groups, np.int64)
+        for i in range(keys.shape[0]):
+            sums[keys[i]] += values[i]
+            counts[keys[i]] += 1
+        return sums / np.maximum(counts, 1), counts
+else:
+    def _group_mean(keys, values, n_groups):
+        counts = np.bincount(keys, minlength=n_groups)
+        return np.bincount(keys, weights=values, minlength=n_groups) / np.maximum(counts, 1), counts
+
+
+def _json(response):
+    """
+    Décode le corps JSON d'une réponse HTTP, avec orjson s'il est installé (2 à 4x plus rapide).
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def weekday_mean(prices, weekdays):
+    """
+    Prix moyen par jour de la semaine à partir des colonnes de derive_columns.
+
+    :param prices: A float64 array of prices.
+    :param weekdays: An integer array of the matching weekdays (0 = Monday).
+    :return: A dictionary {day name: mean price}, for the days present only.
+    """
+    means, counts = _group_mean(np.asarray(weekdays, dtype=np.int64), np.asarray(prices, dtype=np.float64), 7)
+    return {WEEKDAYS[day]: float(means[day]) for day in range(7) if counts[day]}
+
+
+def _group_by_airline(airlines):
+    """
+    Regroupe les offres par compagnie (clé de regroupement pour les calculs numpy).
+
+    :param airlines: An array of airline codes, one per offer.
+    :return: (codes, inverse): the unique airline codes, and the group index of each offer in codes.
+    """
+    return np.unique(airlines, return_inverse=True)
+
+
+def airline_mean(prices, airlines):
+    """
+    Prix moyen par compagnie à partir des colonnes de derive_columns.
+
+    :param prices: A float64 array of prices.
+    :param airlines: An array of the matching airline codes.
+    :return: A dictionary {airline code: mean price}.
+    """
+    codes, inverse = _group_by_airline(airlines)
+    means, _ = _group_mean(inverse.astype(np.int64), np.asarray(prices, dtype=np.float64), len(codes))
+    return dict(zip(codes.tolist(), means.tolist()))
+
+
+class _SessionResponse:
+    """
+    Réponse requests présentée comme celle de urllib.request.urlopen, le format attendu par le SDK Amadeus.
+    """
+    def __init__(self, response):
+        self._response = response
+        self.status = self.code = response.status_code
+
+    def read(self):
+        return self._response.content
+
+    def info(self):
+        return self._response.headers
+
+
+def _write_lines(lines):
+    """
+    Écrit d'un seul coup les lignes d'un affichage, plutôt qu'un print() par ligne.
+    """
+    if lines:
+        sys.stdout.write('\n'.join(lines) + '\n')
 
 
 class FlightScanner:
+    SEATMAP_CACHE_SIZE = 256
+    SEATMAP_WORKERS = 4  # l'environnement de test Amadeus limite à ~10 requêtes/s (1 toutes les 100 ms)
+    SEATMAP_MAX_RETRIES = 3  # nouvelles tentatives sur une réponse 429 (trop de requêtes)
+    SEATMAP_RETRY_DELAY = 0.5  # secondes, doublé à chaque tentative si la réponse n'a pas d'en-tête Retry-After
+    SEATMAP_OFFER_FIELDS = ('type', 'id', 'source', 'itineraries', 'price', 'pricingOptions', 'validatingAirlineCodes', 'travelerPricings')
+    COORDS_DB_PATH = "airport_coords.sqlite3"
+    GEOCODE_WORKERS = 2  # OpenCage limite le nombre de requêtes simultanées
+    TOKEN_CACHE_PATH = ".amadeus_token.json"
+    TOKEN_EXPIRY_MARGIN = 60  # secondes, on renouvelle le token un peu avant son expiration
+    FUEL_DB_PATH = "eia_fuel_prices.sqlite3"
+    FUEL_PRICE_SETTLE_DAYS = 14  # les semaines plus récentes peuvent encore être publiées par l'EIA : on les redemande
+    EIA_PAGE_LENGTH = 5000  # nombre maximal de lignes par réponse de l'API EIA
+
     def __init__(self, api_key, api_secret, geocode_api_key=None, eia_api_key=None):
         """
         Permet l'initalisation de notre client Amadeus API, gérer nos token d'accès, et renseigner les différents code d'API GEOCODE ET EIA.
@@ -35,32 +162,111 @@ class FlightScanner:
         :param geocode_api_key: Your OpenCage Geocode API key for retrieving airport coordinates.
         :param eia_api_key: Your EIA API key for retrieving jet fuel prices.
         """
-        self.amadeus = Client(client_id=api_key, client_secret=api_secret)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=Retry(total=3, backoff_factor=0.2))
+        self.session.mount("https://", adapter)
+        # Le SDK Amadeus passe lui aussi par la session partagée (connexions gardées ouvertes)
+        self.amadeus = Client(client_id=api_key, client_secret=api_secret, http=self._amadeus_http)
+        self.amadeus_headers = {}
+        self._seatmap_cache = OrderedDict()
+        self._seatmap_lock = threading.Lock()
+        self._token_lock = threading.Lock()
+        self._coord_lock = threading.Lock()
+        self._coord_db = self._open_coord_db()
+        # La table statique (coordonnées de référence) prime sur les résultats géocodés
+        self._coord_cache = {**self._load_coord_cache(), **airport_coords}
         self.api_key = api_key
         self.api_secret = api_secret
         self.geocode_api_key = geocode_api_key
         self.eia_api_key = eia_api_key
         self.access_token = None
+        self.token_expiry = 0.0
         self.base_url = "https://test.api.amadeus.com/v1"
+        self._load_cached_token()
         self.get_access_token()
+
+    def close(self):
+        """
+        Ferme la session HTTP partagée et libère les connexions gardées ouvertes.
+        """
+        self.session.close()
+        if self._coord_db is not None:
+            self._coord_db.close()
+            self._coord_db = None
+
+    def _amadeus_http(self, request):
+        """
+        Transport compatible urlopen pour le SDK Amadeus, qui réutilise la session HTTP partagée.
+
+        :param request: The urllib.request.Request built by the SDK.
+        :return: A urlopen-like response object.
+        """
+        try:
+            response = self.session.request(request.get_method(), request.full_url, data=request.data, headers=dict(request.header_items()))
+        except requests.RequestException as e:
+            raise URLError(e)  # le SDK transforme les URLError en NetworkError
+        return _SessionResponse(response)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _set_access_token(self, access_token, expires_at):
+        self.access_token = access_token
+        self.token_expiry = expires_at
+        # Le token n'est envoyé qu'à Amadeus, pas aux autres API qui partagent la session
+        self.amadeus_headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/vnd.amadeus+json",
+        }
+
+    def _load_cached_token(self):
+        """
+        Réutilise le token sauvegardé par une exécution précédente s'il est encore valide,
+        ce qui évite un aller-retour OAuth à chaque démarrage.
+        """
+        if not os.path.exists(self.TOKEN_CACHE_PATH):
+            return
+        try:
+            with open(self.TOKEN_CACHE_PATH, encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cached.get('client_id') == self.api_key and time.time() < cached.get('expires_at', 0) - self.TOKEN_EXPIRY_MARGIN:
+            self._set_access_token(cached['access_token'], cached['expires_at'])
+
+    def _save_token(self):
+        try:
+            fd = os.open(self.TOKEN_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'client_id': self.api_key, 'access_token': self.access_token, 'expires_at': self.token_expiry}, f)
+            os.chmod(self.TOKEN_CACHE_PATH, 0o600)
+        except OSError as e:
+            print(f"Impossible de sauvegarder le token d'accès: {e}")
     
     def get_access_token(self):
         """
-        Permet d'obtenir un token d'accès pour notre API.
+        Permet d'obtenir un token d'accès pour notre API. Le token est renouvelé automatiquement
+        lorsqu'il arrive à expiration.
         """
-        if not self.access_token:
-            url = f"{self.base_url}/security/oauth2/token"
-            headers = {"Content-Type": "application/x-www-form-urlencoded"}
-            body = {
-                "grant_type": "client_credentials",
-                "client_id": self.api_key,
-                "client_secret": self.api_secret
-            }
-            response = requests.post(url, headers=headers, data=body)
-            if response.status_code == 200:
-                self.access_token = response.json().get('access_token')
-            else:
-                print(f"Failed to obtain access token: {response.status_code} - {response.text}")
+        with self._token_lock:
+            if not self.access_token or time.time() >= self.token_expiry - self.TOKEN_EXPIRY_MARGIN:
+                url = f"{self.base_url}/security/oauth2/token"
+                headers = {"Content-Type": "application/x-www-form-urlencoded"}
+                body = {
+                    "grant_type": "client_credentials",
+                    "client_id": self.api_key,
+                    "client_secret": self.api_secret
+                }
+                response = self.session.post(url, headers=headers, data=body)
+                if response.status_code == 200:
+                    token_data = _json(response)
+                    self._set_access_token(token_data.get('access_token'), time.time() + token_data.get('expires_in', 1799))
+                    self._save_token()
+                else:
+                    print(f"Failed to obtain access token: {response.status_code} - {response.text}")
         return self.access_token
     
     def search_flights(self, origin, destination, departure_date, return_date=None):
@@ -100,146 +306,301 @@ class FlightScanner:
         :param show_seat_availability: Boolean to display seat availability information.
         :param show_price: Boolean to display price information.
         :param show_airline: Boolean to display airline information.
-        :param limit: An integer to limit the number of flight options displayed, or "ALL" to show all options.
+        :param limit: An integer to limit the number of flight options displayed, or "ALL" (or None) to show all options.
         :return: A list of dictionaries containing the displayed flight options.
         """
         if not flights:
             print("No flight options found.")
             return []
     
-        
-        if limit != "ALL":
-            limit = min(int(limit), len(flights))
-        else:
-            limit = len(flights)
-    
-        flight_options = []  
-    
-        for idx, flight in enumerate(flights[:limit]):
+        flight_options = []
+        lines = self._render_options(self._limit_flights(flights, limit), show_cabin_class, show_seat_availability,
+                                     show_price, show_airline, flight_options)
+        _write_lines(lines)
+        return flight_options
+
+    def render_flights(self, flights, include=('airline', 'price', 'cabin'), limit="ALL"):
+        """
+        Prépare les lignes d'affichage de display_flight_options (compagnie, prix, segments, classe de cabine,
+        sièges), sans construire les dictionnaires d'options.
+        Les lignes sont renvoyées plutôt qu'écrites : print('\n'.join(...)) pour les afficher.
+
+        :param flights: A list of flight offers returned by the search.
+        :param include: The optional sections to render among 'airline', 'price', 'cabin' and 'seats'.
+        :param limit: An integer to limit the number of flight options rendered, or "ALL" (or None) to render all options.
+        :return: A list of lines.
+        """
+        if not flights:
+            return ["No flight options found."]
+
+        include = frozenset(include)
+        return self._render_options(self._limit_flights(flights, limit), 'cabin' in include, 'seats' in include,
+                                    'price' in include, 'airline' in include)
+
+    @staticmethod
+    def _limit_flights(flights, limit):
+        if limit is None or limit == "ALL":
+            return flights
+        return flights[:int(limit)]
+
+    def _render_options(self, flights, show_cabin_class, show_seat_availability, show_price, show_airline, flight_options=None):
+        """
+        Formate en une seule passe les options de vol, pour display_flight_options et render_flights.
+
+        :param flights: The flight offers to render (already limited).
+        :param flight_options: An optional list, filled with one dictionary per option as in display_flight_options.
+        :return: A list of lines.
+        """
+        lines = []
+        append = lines.append
+        collect = flight_options is not None
+        seat_maps = self.get_seat_maps(flights) if show_seat_availability else []
+
+        for idx, flight in enumerate(flights):
             option_info = {}
-            
-    
-            seat_info = ""
+
             if show_seat_availability:
-                seat_map = self.get_seat_map(flight)
+                seat_map = seat_maps[idx]
                 if seat_map:
                     available_seats, total_seats = self.count_seats(seat_map)
                     seat_info = f"{available_seats}/{total_seats} seats available"
                 else:
                     seat_info = "Seat map data not available"
                 option_info['seat_info'] = seat_info
-            
-            
-            if show_seat_availability:
-                print(f"Option {idx + 1}: {seat_info}")
                 option_info['option'] = f"Option {idx + 1}: {seat_info}"
             else:
-                print(f"Option {idx + 1}:")
                 option_info['option'] = f"Option {idx + 1}:"
-    
-            
+            append(option_info['option'])
+
             if show_airline:
                 airline = flight['validatingAirlineCodes'][0]
-                print(f"  Airline: {airline}")
+                append(f"  Airline: {airline}")
                 option_info['airline'] = airline
-            
-            
+
             if show_price:
                 price = f"{flight['price']['grandTotal']} {flight['price']['currency']}"
-                print(f"  Price: {price}")
+                append(f"  Price: {price}")
                 option_info['price'] = price
-            
-            
+
             segments_info = []
+            fare_details = self._fare_map(flight) if show_cabin_class else {}
+            num_seats = flight['numberOfBookableSeats']
             for itinerary in flight['itineraries']:
                 for segment in itinerary['segments']:
-                    segment_details = {}
                     departure = segment['departure']['iataCode']
                     arrival = segment['arrival']['iataCode']
                     departure_time = segment['departure']['at']
                     arrival_time = segment['arrival']['at']
                     carrier = segment['carrierCode']
                     aircraft = segment['aircraft']['code']
-                    num_seats = flight['numberOfBookableSeats']
-                    
-                    print(f"  Segment: {departure} ({departure_time}) -> {arrival} ({arrival_time})")
-                    print(f"    Operating Airline: {carrier} ({carrier})")
-                    print(f"    Aircraft: {aircraft}")
-                    print(f"    Number of Bookable Seats: {num_seats}")
-                    
-                    segment_details['departure'] = departure
-                    segment_details['arrival'] = arrival
-                    segment_details['departure_time'] = departure_time
-                    segment_details['arrival_time'] = arrival_time
-                    segment_details['operating_airline'] = carrier
-                    segment_details['aircraft'] = aircraft
-                    segment_details['number_of_bookable_seats'] = num_seats
-                    
-                    
+
+                    append(f"  Segment: {departure} ({departure_time}) -> {arrival} ({arrival_time})")
+                    append(f"    Operating Airline: {carrier} ({carrier})")
+                    append(f"    Aircraft: {aircraft}")
+                    append(f"    Number of Bookable Seats: {num_seats}")
                     if show_cabin_class:
-                        segment_id = segment['id']
-                        fare_details = {fare['segmentId']: fare['cabin'] for traveler in flight['travelerPricings'] for fare in traveler['fareDetailsBySegment']}
-                        cabin_class = fare_details.get(segment_id, 'Unknown')
-                        print(f"    Cabin Class: {cabin_class}")
-                        segment_details['cabin_class'] = cabin_class
-    
-                    segments_info.append(segment_details)
-            option_info['segments'] = segments_info
-    
-            print("----------------------------------------")
-            flight_options.append(option_info)
-    
-        return flight_options
+                        cabin_class = fare_details.get(segment['id'], 'Unknown')
+                        append(f"    Cabin Class: {cabin_class}")
 
+                    if collect:
+                        segment_details = {
+                            'departure': departure,
+                            'arrival': arrival,
+                            'departure_time': departure_time,
+                            'arrival_time': arrival_time,
+                            'operating_airline': carrier,
+                            'aircraft': aircraft,
+                            'number_of_bookable_seats': num_seats,
+                        }
+                        if show_cabin_class:
+                            segment_details['cabin_class'] = cabin_class
+                        segments_info.append(segment_details)
 
-    def calculate_statistics(self, flights):
+            append("----------------------------------------")
+            if collect:
+                option_info['segments'] = segments_info
+                flight_options.append(option_info)
+        return lines
+
+
+    @staticmethod
+    def _fare_map(flight):
+        """
+        Associe à chaque segment d'une offre sa classe de cabine.
+
+        :param flight: A flight offer returned by the search.
+        :return: A dictionary {segmentId: cabin}.
+        """
+        return {fare['segmentId']: fare['cabin'] for traveler in flight['travelerPricings'] for fare in traveler['fareDetailsBySegment']}
+
+    def derive_columns(self, flights, fields=None):
+        """
+        Extrait en une seule passe les données utilisées par les analyses (compagnie, prix, jour de départ),
+        pour que chaque analyse n'ait pas à reparcourir et reconvertir les offres.
+
+        :param flights: A list of flight offers, or any iterable of offers (e.g. a generator): it is consumed once.
+        :param fields: Optional subset of the column names below: only those columns are built,
+                       for an analysis called on its own.
+        :return: A dictionary of numpy arrays:
+                 'airline', 'total', 'grand_total', 'stops' (highest numberOfStops of any segment): one entry per offer;
+                 'segment_weekday' (0 = Monday), 'segment_price' (offer grandTotal): one entry per segment;
+                 'fare_flight' (offer index), 'fare_cabin', 'fare_price' (traveler total): one entry per fare detail.
+        """
+        if fields is not None:
+            return self._derive_fields(flights if isinstance(flights, list) else list(flights), fields)
+
+        airlines = []
+        totals = []
+        grand_totals = []
+        stops = []
+        dates = []
+        segment_prices = []
+        fare_flights = []
+        fare_cabins = []
+        fare_prices = []
+        for idx, flight in enumerate(flights):
+            grand_total = float(flight['price']['grandTotal'])
+            airlines.append(flight['validatingAirlineCodes'][0])
+            totals.append(float(flight['price']['total']))
+            grand_totals.append(grand_total)
+            max_stops = 0
+            for itinerary in flight['itineraries']:
+                for segment in itinerary['segments']:
+                    dates.append(segment['departure']['at'][:10])
+                    segment_prices.append(grand_total)
+                    max_stops = max(max_stops, segment.get('numberOfStops', 0))
+            stops.append(max_stops)
+            for traveler in flight['travelerPricings']:
+                traveler_price = float(traveler['price']['total'])
+                for fare in traveler['fareDetailsBySegment']:
+                    fare_flights.append(idx)
+                    fare_cabins.append(fare['cabin'])
+                    fare_prices.append(traveler_price)
+
+        # Le 1970-01-01 était un jeudi : +3 ramène lundi à 0
+        days = np.array(dates, dtype='datetime64[D]').view('int64')
+        return {
+            'airline': np.array(airlines, dtype=str),
+            'total': np.array(totals, dtype=np.float64),
+            'grand_total': np.array(grand_totals, dtype=np.float64),
+            'stops': np.array(stops, dtype=np.int16),
+            'segment_weekday': ((days + 3) % 7).astype(np.int8),
+            'segment_price': np.array(segment_prices, dtype=np.float64),
+            'fare_flight': np.array(fare_flights, dtype=np.int32),
+            'fare_cabin': np.array(fare_cabins, dtype=str),
+            'fare_price': np.array(fare_prices, dtype=np.float64),
+        }
+
+    @staticmethod
+    def _derive_fields(flights, fields):
+        """
+        Construit seulement les colonnes demandées de derive_columns : un parcours dédié par colonne d'offre,
+        un seul parcours pour les colonnes par segment et un seul pour les colonnes par tarif.
+
+        :param flights: A list of flight offers.
+        :param fields: The column names to build.
+        :return: A dictionary of numpy arrays, as in derive_columns.
+        """
+        fields = set(fields)
+        n = len(flights)
+        columns = {}
+        if 'airline' in fields:
+            columns['airline'] = np.array([flight['validatingAirlineCodes'][0] for flight in flights], dtype=str)
+        if 'total' in fields:
+            columns['total'] = np.fromiter((float(flight['price']['total']) for flight in flights), dtype=np.float64, count=n)
+        if 'grand_total' in fields:
+            columns['grand_total'] = np.fromiter((float(flight['price']['grandTotal']) for flight in flights), dtype=np.float64, count=n)
+        if 'stops' in fields:
+            columns['stops'] = np.fromiter(
+                (max((segment.get('numberOfStops', 0) for itinerary in flight['itineraries'] for segment in itinerary['segments']), default=0)
+                 for flight in flights),
+                dtype=np.int16, count=n,
+            )
+
+        if fields & {'segment_weekday', 'segment_price'}:
+            dates = []
+            segment_prices = []
+            for flight in flights:
+                grand_total = float(flight['price']['grandTotal'])
+                for itinerary in flight['itineraries']:
+                    for segment in itinerary['segments']:
+                        dates.append(segment['departure']['at'][:10])
+                        segment_prices.append(grand_total)
+            days = np.array(dates, dtype='datetime64[D]').view('int64')
+            columns['segment_weekday'] = ((days + 3) % 7).astype(np.int8)
+            columns['segment_price'] = np.array(segment_prices, dtype=np.float64)
+
+        if fields & {'fare_flight', 'fare_cabin', 'fare_price'}:
+            fare_flights = []
+            fare_cabins = []
+            fare_prices = []
+            for idx, flight in enumerate(flights):
+                for traveler in flight['travelerPricings']:
+                    traveler_price = float(traveler['price']['total'])
+                    for fare in traveler['fareDetailsBySegment']:
+                        fare_flights.append(idx)
+                        fare_cabins.append(fare['cabin'])
+                        fare_prices.append(traveler_price)
+            columns['fare_flight'] = np.array(fare_flights, dtype=np.int32)
+            columns['fare_cabin'] = np.array(fare_cabins, dtype=str)
+            columns['fare_price'] = np.array(fare_prices, dtype=np.float64)
+
+        return {field: columns[field] for field in fields}
+
+    def calculate_statistics(self, flights, columns=None):
         """
         Permet de calculer des statistiques telles que la moyenne, la médiane pour le prix des vols.
         
         :param flights: A list of flight offers.
+        :param columns: Optional columns already computed by derive_columns(flights).
         :return: A dictionary with airlines as keys and their corresponding statistics.
         """
-        airline_prices = {}
-        
-        for flight in flights:
-            airline_code = flight['validatingAirlineCodes'][0]
-            price = float(flight['price']['total'])
-            
-            if airline_code in airline_prices:
-                airline_prices[airline_code].append(price)
-            else:
-                airline_prices[airline_code] = [price]
-        
+        if columns is None:
+            columns = self.derive_columns(flights, fields=('airline', 'total'))
+        if not len(columns['airline']):
+            return {}
+
+        airlines, inverse = _group_by_airline(columns['airline'])
+        prices = columns['total']
+        means, counts = _group_mean(inverse.astype(np.int64), prices, len(airlines))
+
+        # Regroupe les prix par compagnie pour calculer les médianes
+        order = np.argsort(inverse, kind='stable')
+        groups = np.split(prices[order], np.cumsum(counts)[:-1])
+
         statistics = {}
-        for airline_code, prices in airline_prices.items():
-            stats = {
-                'mean': np.mean(prices),
-                'median': median(prices)
+        for airline_code, mean, group in zip(airlines, means, groups):
+            statistics[str(airline_code)] = {
+                'mean': mean,
+                'median': np.median(group)
             }
-            statistics[airline_code] = stats
         
         return statistics
 
-    def plot_statistics(self, statistics):
+    def plot_statistics(self, statistics, fig=None, path=None):
         """
         Permet de dessiner les graphiques reprenant les statistiques calculés sur les offres de billets
         
         :param statistics: A dictionary with airlines as keys and their corresponding statistics.
+        :param fig: An optional matplotlib Figure to reuse between calls (it is cleared before drawing).
+        :param path: An optional file path: the chart is saved there instead of being shown.
         """
-        airlines = []
-        means = []
-        medians = []
-        
-        for airline_code, stats in statistics.items():
-            airline_name = airline_codes.get(airline_code, airline_code)
-            airlines.append(airline_name)
-            means.append(stats['mean'])
-            medians.append(stats['median'])
+        import matplotlib.pyplot as plt
+
+        # Barres triées par prix moyen décroissant pour un ordre stable d'un appel à l'autre
+        items = sorted(statistics.items(), key=lambda kv: -kv[1]['mean'])
+        airlines = [airline_codes.get(airline_code, airline_code) for airline_code, _ in items]
+        means = np.fromiter((stats['mean'] for _, stats in items), dtype=np.float64, count=len(items))
+        medians = np.fromiter((stats['median'] for _, stats in items), dtype=np.float64, count=len(items))
         
         x = np.arange(len(airlines))  
         width = 0.35  
 
-        fig, ax = plt.subplots()
+        if fig is None:
+            fig, ax = plt.subplots()
+        else:
+            fig.clf()
+            ax = fig.add_subplot()
         bars_mean = ax.bar(x - width/2, means, width, label='Mean Price')
         bars_median = ax.bar(x + width/2, medians, width, label='Median Price')
 
@@ -252,9 +613,12 @@ class FlightScanner:
         ax.legend()
 
         
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        plt.show()
+        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+        fig.tight_layout()
+        if path:
+            fig.savefig(path, dpi=90)
+        else:
+            plt.show()
         
     def display_cabin_classes(self, flights):
         """
@@ -266,13 +630,14 @@ class FlightScanner:
             print("No flight options found.")
             return
         
+        lines = []
         for i, flight in enumerate(flights, 1):
             airline = flight['validatingAirlineCodes'][0]
             itinerary = flight['itineraries'][0]['segments']
-            fare_details = {fare['segmentId']: fare['cabin'] for traveler in flight['travelerPricings'] for fare in traveler['fareDetailsBySegment']}
+            fare_details = self._fare_map(flight)
             
-            print(f"Option {i}:")
-            print(f"  Airline: {airline}")
+            lines.append(f"Option {i}:")
+            lines.append(f"  Airline: {airline}")
             for segment in itinerary:
                 departure = segment['departure']['iataCode']
                 arrival = segment['arrival']['iataCode']
@@ -281,9 +646,10 @@ class FlightScanner:
                 segment_id = segment['id']
                 cabin_class = fare_details.get(segment_id, 'Unknown')
                 
-                print(f"  Segment: {departure} ({departure_time}) -> {arrival} ({arrival_time})")
-                print(f"    Cabin Class: {cabin_class}")
-            print("-" * 40)
+                lines.append(f"  Segment: {departure} ({departure_time}) -> {arrival} ({arrival_time})")
+                lines.append(f"    Cabin Class: {cabin_class}")
+            lines.append("-" * 40)
+        _write_lines(lines)
 
     def inspect_full_data(self, flights):
         """
@@ -295,10 +661,12 @@ class FlightScanner:
             print("No flight options found.")
             return
         
+        lines = []
         for i, flight in enumerate(flights, 1):
-            print(f"Option {i}:")
-            print(f"Full flight data: {flight}")
-            print("-" * 40)
+            lines.append(f"Option {i}:")
+            lines.append(f"Full flight data: {flight}")
+            lines.append("-" * 40)
+        _write_lines(lines)
     def display_top_10_cheapest_options(self, flights):
         """
         Cette fonctionnalité nous permet d'afficher les 10 options les moins chères
@@ -310,71 +678,123 @@ class FlightScanner:
             return
         
         
-        sorted_flights = sorted(flights, key=lambda x: float(x['price']['total']))
-        
-        
-        top_10_flights = sorted_flights[:10]
+        top_10_flights = heapq.nsmallest(10, flights, key=lambda x: float(x['price']['total']))
         
+        lines = []
         for i, flight in enumerate(top_10_flights, 1):
             price = flight['price']['total']
             airline = flight['validatingAirlineCodes'][0]
             itinerary = flight['itineraries'][0]['segments']
             
-            print(f"Option {i}:")
-            print(f"  Airline: {airline}")
-            print(f"  Price: {price} EUR")
+            lines.append(f"Option {i}:")
+            lines.append(f"  Airline: {airline}")
+            lines.append(f"  Price: {price} EUR")
             for segment in itinerary:
                 departure = segment['departure']['iataCode']
                 arrival = segment['arrival']['iataCode']
                 departure_time = segment['departure']['at']
                 arrival_time = segment['arrival']['at']
-                print(f"  Segment: {departure} ({departure_time}) -> {arrival} ({arrival_time})")
-            print("-" * 40)
+                lines.append(f"  Segment: {departure} ({departure_time}) -> {arrival} ({arrival_time})")
+            lines.append("-" * 40)
+        _write_lines(lines)
 
 
+    def _seatmap_key(self, flight_offer):
+        """
+        Clé de cache d'une offre : les id Amadeus ne sont uniques qu'au sein d'une recherche,
+        on utilise donc une empreinte du contenu de l'offre.
+        """
+        payload = json.dumps(flight_offer, sort_keys=True).encode('utf-8')
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
     def get_seat_map(self, flight_offer):
+        """
+        Récupère la carte des sièges d'une offre, une seule fois par offre (cache LRU).
+
+        :param flight_offer: A flight offer returned by the search.
+        :return: The seat map data, or None if it could not be retrieved.
+        """
+        key = self._seatmap_key(flight_offer)
+        with self._seatmap_lock:
+            if key in self._seatmap_cache:
+                self._seatmap_cache.move_to_end(key)
+                return self._seatmap_cache[key]
+
+        self.get_access_token()
         url = f"{self.base_url}/shopping/seatmaps"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/vnd.amadeus+json",
-        }
-        body = {"data": [flight_offer]}
+        # Champs de l'offre transmis à l'endpoint seatmaps (dont source et price, requis par le schéma flight-offer) :
+        # seuls les champs d'information de l'offre (dates de billetterie, nombre de sièges...) sont omis
+        trimmed_offer = {field: flight_offer[field] for field in self.SEATMAP_OFFER_FIELDS if field in flight_offer}
+        body = {"data": [trimmed_offer]}
         
-        response = requests.post(url, json=body, headers=headers)
+        response = self.session.post(url, json=body, headers=self.amadeus_headers)
+        for attempt in range(self.SEATMAP_MAX_RETRIES):
+            if response.status_code != 429:
+                break
+            time.sleep(self._retry_delay(response, attempt))
+            response = self.session.post(url, json=body, headers=self.amadeus_headers)
         if response.status_code == 200:
-            seatmap_data = response.json()
+            seatmap_data = _json(response)
+            with self._seatmap_lock:
+                self._seatmap_cache[key] = seatmap_data
+                if len(self._seatmap_cache) > self.SEATMAP_CACHE_SIZE:
+                    self._seatmap_cache.popitem(last=False)
             return seatmap_data
         else:
             print(f"Error retrieving seat map: {response.status_code} - {response.text}")
             return None
+
+    def _retry_delay(self, response, attempt):
+        """
+        Délai avant de renvoyer une requête refusée en 429 : l'en-tête Retry-After s'il est donné en secondes,
+        sinon SEATMAP_RETRY_DELAY doublé à chaque tentative.
+        """
+        try:
+            return max(float(response.headers.get('Retry-After', '')), 0.0)
+        except ValueError:
+            return self.SEATMAP_RETRY_DELAY * 2 ** attempt
+
+    def get_seat_maps(self, flights):
+        """
+        Récupère en parallèle les cartes des sièges de plusieurs offres, dans l'ordre des offres.
+
+        :param flights: A list of flight offers returned by the search.
+        :return: A list of seat map data (or None) aligned with flights.
+        """
+        if not flights:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.SEATMAP_WORKERS, len(flights))) as executor:
+            return list(executor.map(self.get_seat_map, flights))
     
             
     def check_seat_availability(self, flights):
+        seat_maps = self.get_seat_maps(flights)
+        lines = []
         for idx, flight in enumerate(flights):
-            print(f"Option {idx + 1}:")
-            print(f"  Airline: {flight['validatingAirlineCodes'][0]}")
-            print(f"  Price: {flight['price']['grandTotal']} {flight['price']['currency']}")
-            
+            lines.append(f"Option {idx + 1}:")
+            lines.append(f"  Airline: {flight['validatingAirlineCodes'][0]}")
+            lines.append(f"  Price: {flight['price']['grandTotal']} {flight['price']['currency']}")
             
+            # La carte des sièges dépend de l'offre et non du segment
+            seat_map = seat_maps[idx]
             for itinerary in flight['itineraries']:
                 for segment in itinerary['segments']:
-                    print(f"  Segment: {segment['departure']['iataCode']} -> {segment['arrival']['iataCode']}")
-                    print(f"    Departure: {segment['departure']['at']}")
-                    print(f"    Arrival: {segment['arrival']['at']}")
-                    print(f"    Aircraft: {segment['aircraft']['code']}")
-                    print(f"    Number of Bookable Seats: {flight['numberOfBookableSeats']}")
+                    lines.append(f"  Segment: {segment['departure']['iataCode']} -> {segment['arrival']['iataCode']}")
+                    lines.append(f"    Departure: {segment['departure']['at']}")
+                    lines.append(f"    Arrival: {segment['arrival']['at']}")
+                    lines.append(f"    Aircraft: {segment['aircraft']['code']}")
+                    lines.append(f"    Number of Bookable Seats: {flight['numberOfBookableSeats']}")
     
-                    seat_map = self.get_seat_map(flight)
                     if seat_map:
                         available_seats, total_seats = self.count_seats(seat_map)
-                        print(f"    Seat Availability: {available_seats}/{total_seats} seats available")
+                        lines.append(f"    Seat Availability: {available_seats}/{total_seats} seats available")
                     else:
-                        print("    Seat map data not available")
-            print("----------------------------------------")          
+                        lines.append("    Seat map data not available")
+            lines.append("----------------------------------------")          
+        _write_lines(lines)
             
     def aggregate_seat_data(self, flights):
-        for idx, flight in enumerate(flights):
-            seatmap_data = self.get_seat_map(flight)
+        for idx, seatmap_data in enumerate(self.get_seat_maps(flights)):
             if seatmap_data:
                 available_seats, total_seats = self.count_seats(seatmap_data)
                 print(f"Option {idx + 1}: {available_seats}/{total_seats} seats available")
@@ -382,20 +802,7 @@ class FlightScanner:
                 print(f"Option {idx + 1}: Seat map data not available")
                 
     def count_available_seats(self, seatmap_data):
-        available_seats = 0
-        
-        
-        if seatmap_data and isinstance(seatmap_data, dict) and 'data' in seatmap_data:
-            seatmap = seatmap_data['data'][0]  
-            for deck in seatmap.get('decks', []):
-                for seat in deck.get('seats', []):
-                    for pricing in seat.get('travelerPricing', []):
-                        if pricing.get('seatAvailabilityStatus') == 'AVAILABLE':
-                            available_seats += 1
-        else:
-            print("Unexpected seat map data structure or empty data.")
-        
-        return available_seats
+        return self.count_seats(seatmap_data)[0]
     
     def count_seats(self, seatmap_data):
         available_seats = 0
@@ -403,12 +810,11 @@ class FlightScanner:
     
         if seatmap_data and isinstance(seatmap_data, dict) and 'data' in seatmap_data:
             seatmap = seatmap_data['data'][0]  
-            for deck in seatmap.get('decks', []):
-                for seat in deck.get('seats', []):
-                    total_seats += 1
-                    for pricing in seat.get('travelerPricing', []):
-                        if pricing.get('seatAvailabilityStatus') == 'AVAILABLE':
-                            available_seats += 1
+            for deck in seatmap.get('decks', ()):
+                seats = deck.get('seats', ())
+                total_seats += len(seats)
+                available_seats += sum(1 for seat in seats for pricing in seat.get('travelerPricing', ())
+                                       if pricing.get('seatAvailabilityStatus') == 'AVAILABLE')
         else:
             print("Unexpected seat map data structure or empty data.")
     
@@ -427,65 +833,76 @@ class FlightScanner:
         :param date_str: La date au format ISO (YYYY-MM-DDTHH:MM:SS).
         :return: Le jour de la semaine en texte (ex. "Monday").
         """
-        date_obj = datetime.fromisoformat(date_str)
-        return date_obj.strftime('%A')
+        # Algorithme de Sakamoto sur le préfixe YYYY-MM-DD, sans analyser l'horodatage complet
+        year, month, day = int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10])
+        if month < 3:
+            year -= 1
+        weekday = (year + year // 4 - year // 100 + year // 400 + _SAKAMOTO_OFFSETS[month - 1] + day) % 7
+        return WEEKDAYS[(weekday + 6) % 7]
 
 
     def filter_flights(self, flights, max_duration=None, max_stops=None, airlines=None, cabin_class=None):
-            filtered_flights = []
-            for flight in flights:
-                add_flight = True
-                for itinerary in flight['itineraries']:
-                    if max_duration and self._get_duration(itinerary['duration']) > max_duration:
-                        add_flight = False
-                    if max_stops and any(segment['numberOfStops'] > max_stops for segment in itinerary['segments']):
-                        add_flight = False
-                    if airlines and flight['validatingAirlineCodes'][0] not in airlines:
-                        add_flight = False
-                    if cabin_class:
-                        for traveler in flight['travelerPricings']:
-                            if all(detail['cabin'] != cabin_class for detail in traveler['fareDetailsBySegment']):
-                                add_flight = False
-                if add_flight:
-                    filtered_flights.append(flight)
-            return filtered_flights
-        
-    def analyze_prices_by_weekday(self, flights):
         """
-        Analyse des prix moyens par jour de la semaine.
+        Filtre les offres de vol selon la durée, le nombre d'escales, la compagnie et la classe de cabine.
 
         :param flights: La liste des offres de vol.
-        :return: Un dictionnaire des prix moyens par jour de la semaine.
+        :param max_duration: Durée maximale d'un itinéraire, en minutes.
+        :param max_stops: Nombre maximal d'escales par segment.
+        :param airlines: Liste des codes IATA des compagnies acceptées.
+        :param cabin_class: Classe de cabine recherchée (ex. "ECONOMY").
+        :return: La liste des offres retenues.
         """
-        prices_by_day = {}
-        count_by_day = {}
-
+        airlines_set = set(airlines) if airlines else None
+        filtered_flights = []
         for flight in flights:
+            # Test le moins coûteux et le plus sélectif en premier
+            if airlines_set and flight['validatingAirlineCodes'][0] not in airlines_set:
+                continue
+            # Chaque voyageur doit avoir au moins un segment dans la classe demandée (arrêt au premier voyageur qui n'en a pas)
+            if cabin_class and not all(any(detail['cabin'] == cabin_class for detail in traveler['fareDetailsBySegment'])
+                                       for traveler in flight['travelerPricings']):
+                continue
+            add_flight = True
             for itinerary in flight['itineraries']:
-                for segment in itinerary['segments']:
-                    departure_day = self._get_weekday(segment['departure']['at'])
-                    price = float(flight['price']['grandTotal'])
-
-                    if departure_day not in prices_by_day:
-                        prices_by_day[departure_day] = 0.0
-                        count_by_day[departure_day] = 0
+                if max_duration and self._get_duration(itinerary['duration']) > max_duration:
+                    add_flight = False
+                    break
+                if max_stops and any(segment['numberOfStops'] > max_stops for segment in itinerary['segments']):
+                    add_flight = False
+                    break
+            if add_flight:
+                filtered_flights.append(flight)
+        return filtered_flights
+        
+    def analyze_prices_by_weekday(self, flights, columns=None):
+        """
+        Analyse des prix moyens par jour de la semaine.
 
-                    prices_by_day[departure_day] += price
-                    count_by_day[departure_day] += 1
+        :param flights: La liste des offres de vol.
+        :param columns: Les colonnes déjà calculées par derive_columns(flights), optionnel.
+        :return: Un dictionnaire des prix moyens par jour de la semaine.
+        """
+        if columns is None:
+            columns = self.derive_columns(flights, fields=('segment_weekday', 'segment_price'))
+        return weekday_mean(columns['segment_price'], columns['segment_weekday'])
 
-        
-        for day in prices_by_day:
-            prices_by_day[day] /= count_by_day[day]
+    def analyze_prices_by_weekday_arr(self, flights, columns=None):
+        """
+        Variante de analyze_prices_by_weekday renvoyant un tableau de 7 prix moyens, indexé comme WEEKDAYS.
 
-        return prices_by_day
+        :param flights: La liste des offres de vol.
+        :param columns: Les colonnes déjà calculées par derive_columns(flights), optionnel.
+        :return: Un tableau float64 de 7 prix moyens (0 = lundi), NaN pour les jours sans vol.
+        """
+        if columns is None:
+            columns = self.derive_columns(flights, fields=('segment_weekday', 'segment_price'))
+        means, counts = _group_mean(np.asarray(columns['segment_weekday'], dtype=np.int64), columns['segment_price'], 7)
+        return np.where(counts > 0, means, np.nan)
     
-    def calculate_average_price_by_airline(self, flights):
-        price_by_airline = defaultdict(list)
-        for flight in flights:
-            airline = flight['validatingAirlineCodes'][0]
-            price_by_airline[airline].append(float(flight['price']['grandTotal']))
-        average_price_by_airline = {airline: sum(prices)/len(prices) for airline, prices in price_by_airline.items()}
-        return average_price_by_airline
+    def calculate_average_price_by_airline(self, flights, columns=None):
+        if columns is None:
+            columns = self.derive_columns(flights, fields=('airline', 'grand_total'))
+        return airline_mean(columns['grand_total'], columns['airline'])
     
     def compare_cabins(self, flights):
         comparison_results = []
@@ -499,28 +916,79 @@ class FlightScanner:
                         cabin_comparison[cabin] = price
             comparison_results.append(cabin_comparison)
         return comparison_results
+
+    def compare_cabins_vec(self, flights, columns=None, mask=None):
+        """
+        Synthèse par classe de cabine de compare_cabins : pour chaque cabine, le nombre d'offres qui la proposent,
+        la moyenne et le minimum du prix le plus bas de la cabine dans chaque offre. Calculé sur les colonnes numpy.
+
+        :param flights: A list of flight offers.
+        :param columns: Optional columns already computed by derive_columns(flights).
+        :param mask: Optional boolean array, one entry per offer: only the selected offers are compared
+                     (e.g. the mask of a filter computed on the same columns).
+        :return: A dictionary with cabins as keys and {'count', 'mean', 'min'} as values.
+        """
+        if columns is None:
+            columns = self.derive_columns(flights, fields=('fare_flight', 'fare_cabin', 'fare_price'))
+        fare_flight, fare_cabin, fare_price = columns['fare_flight'], columns['fare_cabin'], columns['fare_price']
+        if mask is not None:
+            selected = np.asarray(mask, dtype=bool)[fare_flight]
+            fare_flight, fare_cabin, fare_price = fare_flight[selected], fare_cabin[selected], fare_price[selected]
+        if not len(fare_cabin):
+            return {}
+
+        cabins, cabin_codes = np.unique(fare_cabin, return_inverse=True)
+        # Prix le plus bas de chaque couple (offre, cabine), comme dans compare_cabins
+        pairs, pair_index = np.unique(fare_flight.astype(np.int64) * len(cabins) + cabin_codes, return_inverse=True)
+        pair_min = np.full(len(pairs), np.inf)
+        np.minimum.at(pair_min, pair_index, fare_price)
+        pair_cabin = pairs % len(cabins)
+
+        counts = np.bincount(pair_cabin, minlength=len(cabins))
+        means = np.bincount(pair_cabin, weights=pair_min, minlength=len(cabins)) / counts
+        mins = np.full(len(cabins), np.inf)
+        np.minimum.at(mins, pair_cabin, pair_min)
+        return {
+            str(cabin): {'count': int(count), 'mean': float(mean), 'min': float(minimum)}
+            for cabin, count, mean, minimum in zip(cabins, counts, means, mins)
+        }
     
-    def visualize_itineraries(self, flights):
+    def visualize_itineraries(self, flights, path=None):
         """
         Visualise les itinéraires de vol en utilisant une représentation simple.
 
         :param flights: La liste des offres de vol filtrées.
+        :param path: Chemin d'un fichier image où enregistrer la figure au lieu de l'afficher, optionnel.
         """
         import matplotlib.pyplot as plt
 
-        for idx, flight in enumerate(flights):
-            times = []
-            labels = []
-            for itinerary in flight['itineraries']:
-                for segment in itinerary['segments']:
-                    times.append(self._get_duration(segment['duration']))
-                    labels.append(f"{segment['departure']['iataCode']} -> {segment['arrival']['iataCode']}")
-            
-            plt.figure(figsize=(10, 6))
-            plt.barh(labels, times, color='skyblue')
-            plt.xlabel('Duration (minutes)')
-            plt.ylabel('Flight Segment')
-            plt.title(f'Itinerary {idx + 1}')
+        if not flights:
+            print("No flight options found.")
+            return
+
+        # Une seule figure avec une grille de sous-graphiques plutôt qu'une figure par vol
+        n_cols = min(3, len(flights))
+        n_rows = math.ceil(len(flights) / n_cols)
+        fig, axes = plt.subplots(n_rows, n_cols, figsize=(5 * n_cols, 4 * n_rows), squeeze=False)
+
+        for idx, (flight, ax) in enumerate(zip(flights, axes.flat)):
+            segments = [segment for itinerary in flight['itineraries'] for segment in itinerary['segments']]
+            times = np.array([self._get_duration(segment['duration']) for segment in segments])
+            labels = [f"{segment['departure']['iataCode']} -> {segment['arrival']['iataCode']}" for segment in segments]
+
+            ax.barh(labels, times, color='skyblue')
+            ax.set_xlabel('Duration (minutes)')
+            ax.set_ylabel('Flight Segment')
+            ax.set_title(f'Itinerary {idx + 1}')
+
+        for ax in axes.flat[len(flights):]:
+            ax.set_visible(False)
+
+        fig.tight_layout()
+        if path:
+            fig.savefig(path, dpi=90)
+            plt.close(fig)
+        else:
             plt.show()
             
     def _get_duration(self, duration_str):
@@ -530,13 +998,19 @@ class FlightScanner:
         :param duration_str: La durée au format ISO 8601 (ex. "PT2H30M").
         :return: La durée en minutes.
         """
-        match = re.match(r'PT(\d+H)?(\d+M)?', duration_str)
-        hours = int(match.group(1)[:-1]) if match.group(1) else 0
-        minutes = int(match.group(2)[:-1]) if match.group(2) else 0
+        # Format très court : un simple découpage sur 'H' et 'M' est plus rapide qu'une regex
+        s = duration_str[2:]
+        h_idx = s.find('H')
+        hours = int(s[:h_idx]) if h_idx != -1 else 0
+        rest = s[h_idx + 1:]
+        m_idx = rest.find('M')
+        minutes = int(rest[:m_idx]) if m_idx != -1 else 0
         return hours * 60 + minutes
     
     def plot_flight_route(self, flight):
         """Génère une carte affichant la route du vol entre l'aéroport de départ et l'aéroport d'arrivée."""
+        import folium
+
         segments = flight['itineraries'][0]['segments']
         departure_airport = segments[0]['departure']['iataCode']
         arrival_airport = segments[-1]['arrival']['iataCode']
@@ -569,18 +1043,75 @@ class FlightScanner:
     """
     
     
+    @staticmethod
+    def distance_km_vec(lat1, lon1, lat2, lon2):
+        """
+        Distance orthodromique (formule de haversine, Terre sphérique) entre deux séries de points.
+        Largement suffisant pour l'estimation du carburant et de la durée de vol (±0.5%).
+
+        :param lat1, lon1: Latitudes/longitudes of the departure points, in degrees.
+        :param lat2, lon2: Latitudes/longitudes of the arrival points, in degrees.
+        :return: The distances in km, as a numpy array (or a float for scalar inputs).
+        """
+        lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    def _resolve_airports(self, iata_codes):
+        """
+        Résout les coordonnées de plusieurs aéroports ; ceux absents du cache sont géocodés en parallèle.
+
+        :param iata_codes: An iterable of IATA codes.
+        :return: A dictionary {upper-cased IATA code: (latitude, longitude) or None}.
+        """
+        codes = {code.upper() for code in iata_codes}
+        resolved = {code: self._coord_cache[code] for code in codes if code in self._coord_cache}
+        missing = [code for code in codes if code not in resolved]
+        if len(missing) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.GEOCODE_WORKERS, len(missing))) as executor:
+                resolved.update(zip(missing, executor.map(self.get_airport_coordinates, missing)))
+        else:
+            resolved.update((code, self.get_airport_coordinates(code)) for code in missing)
+        return resolved
+
     def calculate_distance(self, departure_airport, arrival_airport):
-        departure_coords = self.get_airport_coordinates(departure_airport)
-        arrival_coords = self.get_airport_coordinates(arrival_airport)
+        coords = self._resolve_airports((departure_airport, arrival_airport))
+        departure_coords = coords[departure_airport.upper()]
+        arrival_coords = coords[arrival_airport.upper()]
 
         if departure_coords and arrival_coords:
-            return geodesic(departure_coords, arrival_coords).km
+            return float(self.distance_km_vec(departure_coords[0], departure_coords[1], arrival_coords[0], arrival_coords[1]))
         else:
             print("Impossible de calculer la distance, coordonnées manquantes.")
             return None
+
+    def calculate_distance_batch(self, pairs):
+        """
+        Calcule en une seule fois les distances d'une liste de routes.
+
+        :param pairs: A list of (departure_airport, arrival_airport) IATA code tuples.
+        :return: A numpy array of distances in km, NaN where coordinates are missing.
+        """
+        resolved = self._resolve_airports(code for pair in pairs for code in pair)
+        coords = np.full((len(pairs), 4), np.nan)
+        for i, (departure_airport, arrival_airport) in enumerate(pairs):
+            departure_coords = resolved[departure_airport.upper()]
+            arrival_coords = resolved[arrival_airport.upper()]
+            if departure_coords and arrival_coords:
+                coords[i] = (*departure_coords, *arrival_coords)
+
+        lat1, lon1, lat2, lon2 = coords.T
+        if njit is not None and len(pairs) > JIT_BATCH_THRESHOLD:
+            return _haversine_km_jit(*(np.ascontiguousarray(v) for v in (lat1, lon1, lat2, lon2)))
+        return self.distance_km_vec(lat1, lon1, lat2, lon2)
     
-    def estimate_flight_cost(self, aircraft_type, passengers, bags_per_passenger, departure_airport, arrival_airport, fuel_price_per_litre):
-        
+    def make_cost_estimator(self, aircraft_type, passengers, bags_per_passenger, fuel_price_per_litre):
+        """
+        Précalcule le modèle de coût pour un avion et un remplissage donnés : le coût ne dépend plus que
+        de la distance, la fonction renvoyée peut donc être appliquée directement à chaque route.
+
+        :return: A function estimate(distance_km) returning the same dictionary as estimate_flight_cost.
+        """
         fuel_consumption_per_hour = 2500  # litres par heure moyenne pour Boeing 737
         average_speed_kmh = 850  # vitesse moyenne en km/h
         crew_cost_per_hour = 500  # EUR
@@ -590,44 +1121,84 @@ class FlightScanner:
         mtow = 70534  # Maximum poids embarqué pour un Boeing 737
         
         
-        distance_km = self.calculate_distance(departure_airport, arrival_airport)
-        
-        
-        flight_duration_hours = distance_km / average_speed_kmh
-        
-        
         passenger_weight = 100  # estimation avec un passager + bagage
         total_weight = oew + (passengers * passenger_weight)
         
         
         weight_factor = total_weight / oew
         adjusted_fuel_consumption_per_hour = fuel_consumption_per_hour * (1 + 0.005 * (weight_factor - 1))  # 0.5% D'augmentation par 1% d'augmentation de poids
-        total_fuel_needed = adjusted_fuel_consumption_per_hour * flight_duration_hours
-        fuel_cost = total_fuel_needed * fuel_price_per_litre
-        
-        
-        crew_cost = crew_cost_per_hour * flight_duration_hours
-        maintenance_cost = maintenance_cost_per_hour * flight_duration_hours
-        
+        cost_per_hour = adjusted_fuel_consumption_per_hour * fuel_price_per_litre + crew_cost_per_hour + maintenance_cost_per_hour
         
-        total_cost = fuel_cost + crew_cost + airport_fees + maintenance_cost
-        cost_per_passenger = total_cost / passengers
         
+        def estimate(distance_km):
+            flight_duration_hours = distance_km / average_speed_kmh
+            total_cost = cost_per_hour * flight_duration_hours + airport_fees
+            return {
+                "Total Cost (EUR)": total_cost,
+                "Cost per Passenger (EUR)": total_cost / passengers,
+                "Flight Duration (hours)": flight_duration_hours,
+                "Fuel Needed (litres)": adjusted_fuel_consumption_per_hour * flight_duration_hours
+            }
         
-        return {
-            "Total Cost (EUR)": total_cost,
-            "Cost per Passenger (EUR)": cost_per_passenger,
-            "Flight Duration (hours)": flight_duration_hours,
-            "Fuel Needed (litres)": total_fuel_needed
-      }
+        return estimate
+
+    def estimate_flight_cost(self, aircraft_type, passengers, bags_per_passenger, departure_airport, arrival_airport, fuel_price_per_litre):
+        estimate = self.make_cost_estimator(aircraft_type, passengers, bags_per_passenger, fuel_price_per_litre)
+        distance_km = self.calculate_distance(departure_airport, arrival_airport)
+        return estimate(distance_km)
+    def _open_coord_db(self):
+        """
+        Ouvre la base SQLite qui conserve les coordonnées d'aéroports d'une exécution à l'autre.
+        """
+        try:
+            db = sqlite3.connect(self.COORDS_DB_PATH, check_same_thread=False)
+            db.execute("CREATE TABLE IF NOT EXISTS coords(iata TEXT PRIMARY KEY, lat REAL, lng REAL)")
+            return db
+        except sqlite3.Error as e:
+            print(f"Impossible d'ouvrir le cache des coordonnées: {e}")
+            return None
+
+    def _load_coord_cache(self):
+        """
+        Charge les coordonnées d'aéroports déjà géocodées lors des exécutions précédentes.
+        """
+        if self._coord_db is None:
+            return {}
+        with self._coord_lock:
+            rows = self._coord_db.execute("SELECT iata, lat, lng FROM coords").fetchall()
+        return {code: (lat, lng) for code, lat, lng in rows}
+
+    def _save_coords(self, code, coords):
+        if self._coord_db is None:
+            return
+        try:
+            with self._coord_lock:
+                self._coord_db.execute("INSERT OR REPLACE INTO coords(iata, lat, lng) VALUES (?, ?, ?)", (code, *coords))
+                self._coord_db.commit()
+        except sqlite3.Error as e:
+            print(f"Impossible d'écrire le cache des coordonnées: {e}")
+
     def get_airport_coordinates(self, iata_code): 
-        url = f"https://api.opencagedata.com/geocode/v1/json?q={iata_code}&key={self.geocode_api_key}&limit=1"
-        response = requests.get(url)
-        data = response.json()
+        """
+        Retourne les coordonnées (latitude, longitude) d'un aéroport. Elles ne changent pas,
+        elles sont donc gardées en cache et sauvegardées sur disque.
+
+        :param iata_code: The IATA code of the airport (e.g., 'CDG').
+        :return: A (latitude, longitude) tuple, or None if the airport was not found.
+        """
+        code = iata_code.upper()
+        if code in self._coord_cache:
+            return self._coord_cache[code]
+
+        url = f"https://api.opencagedata.com/geocode/v1/json?q={code}&key={self.geocode_api_key}&limit=1"
+        response = self.session.get(url)
+        data = _json(response)
 
         if data['results']:
             latitude = data['results'][0]['geometry']['lat']
             longitude = data['results'][0]['geometry']['lng']
+            self._coord_cache[code] = (latitude, longitude)
+            self._save_coords(code, (latitude, longitude))
             return latitude, longitude
         else:
             print(f"Coordonnées non trouvées pour l'aéroport avec le code IATA {iata_code}.")
@@ -636,35 +1207,129 @@ class FlightScanner:
     def get_jet_fuel_price(self, start_date="2024-01-01", end_date="2024-08-16"):
         """
         Pour récupérer les prix du fuel, mais ne fonctionne pas trop encore pour le moment.
+        Les prix publiés par l'EIA ne changent plus : ils sont gardés dans une base SQLite et
+        seules les dates pas encore couvertes par la base sont demandées à l'API.
 
         :param start_date: The start date for the data range (format: YYYY-MM-DD).
         :param end_date: The end date for the data range (format: YYYY-MM-DD).
-        :return: A dictionary with the date and corresponding fuel price or None if an error occurs.
+        :return: A numpy structured array of (date, price) rows (price per gallon, dtype FUEL_PRICE_DTYPE),
+                 or None if an error occurs. See fuel_prices_to_records for the former list-of-dicts format.
         """
-        api_url = (
-            f"https://api.eia.gov/v2/petroleum/pri/spt/data/"
-            f"?frequency=weekly&data[0]=value&start={start_date}&end={end_date}"
-            f"&sort[0][column]=period&sort[0][direction]=desc&offset=0&length=5000"
-        )
+        try:
+            db = sqlite3.connect(self.FUEL_DB_PATH)
+        except sqlite3.Error as e:
+            print(f"Impossible d'ouvrir le cache des prix du carburant: {e}")
+            return self._fetch_jet_fuel_price(start_date, end_date)
 
-        
-        response = requests.get(api_url, headers={"api_key": self.eia_api_key})
+        try:
+            with db:
+                db.execute("CREATE TABLE IF NOT EXISTS fuel_prices(period TEXT, price REAL)")
+                db.execute("CREATE TABLE IF NOT EXISTS fuel_coverage(start TEXT, end TEXT)")
+                coverage = db.execute("SELECT start, end FROM fuel_coverage ORDER BY start").fetchall()
 
-        
-        if response.status_code == 200:
-            
-            data = response.json()
+            # Sous-plages de [start_date, end_date] qui ne sont couvertes par aucun intervalle déjà en base
+            missing = []
+            cursor = start_date
+            for covered_start, covered_end in coverage:
+                if covered_end < cursor:
+                    continue
+                if covered_start > end_date:
+                    break
+                if covered_start > cursor:
+                    missing.append((cursor, str(np.datetime64(covered_start) - 1)))
+                cursor = str(np.datetime64(covered_end) + 1)
+            if cursor <= end_date:
+                missing.append((cursor, end_date))
+
+            settled = str(np.datetime64('today', 'D') - self.FUEL_PRICE_SETTLE_DAYS)
+            for fetch_start, fetch_end in missing:
+                fuel_prices = self._fetch_jet_fuel_price(fetch_start, fetch_end)
+                if fuel_prices is None:
+                    return None
+                with db:
+                    db.execute("DELETE FROM fuel_prices WHERE period BETWEEN ? AND ?", (fetch_start, fetch_end))
+                    db.executemany("INSERT INTO fuel_prices(period, price) VALUES (?, ?)",
+                                   [(str(date), float(price)) for date, price in fuel_prices.tolist()])
+                    # Seule une plage téléchargée en entier est marquée comme couverte
+                    if fetch_start <= min(fetch_end, settled):
+                        coverage.append((fetch_start, min(fetch_end, settled)))
+                        self._save_fuel_coverage(db, coverage)
+
+            rows = db.execute(
+                "SELECT period, price FROM fuel_prices WHERE period BETWEEN ? AND ? ORDER BY period DESC, rowid",
+                (start_date, end_date),
+            ).fetchall()
+            return np.array([(period, np.nan if price is None else price) for period, price in rows], dtype=FUEL_PRICE_DTYPE)
+        except sqlite3.Error as e:
+            print(f"Impossible d'utiliser le cache des prix du carburant: {e}")
+            return self._fetch_jet_fuel_price(start_date, end_date)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _save_fuel_coverage(db, coverage):
+        """
+        Réécrit les intervalles de dates couverts par le cache, en fusionnant ceux qui se chevauchent ou se touchent.
+        """
+        merged = []
+        for start, end in sorted(coverage):
+            if merged and start <= str(np.datetime64(merged[-1][1]) + 1):
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        coverage[:] = merged
+        db.execute("DELETE FROM fuel_coverage")
+        db.executemany("INSERT INTO fuel_coverage(start, end) VALUES (?, ?)", merged)
+
+    def _fetch_jet_fuel_price(self, start_date, end_date):
+        """
+        Interroge l'API de l'EIA pour les prix du fuel entre deux dates (sans passer par le cache).
+        L'API renvoie au plus EIA_PAGE_LENGTH lignes par requête : les pages sont lues jusqu'à la dernière.
+
+        :param start_date: The start date for the data range (format: YYYY-MM-DD).
+        :param end_date: The end date for the data range (format: YYYY-MM-DD).
+        :return: A numpy structured array of (date, price) rows, or None if an error occurs.
+        """
+        pages = []
+        offset = 0
+        while True:
+            api_url = (
+                f"https://api.eia.gov/v2/petroleum/pri/spt/data/"
+                f"?frequency=weekly&data[0]=value&start={start_date}&end={end_date}"
+                f"&sort[0][column]=period&sort[0][direction]=desc&offset={offset}&length={self.EIA_PAGE_LENGTH}"
+            )
+
+            response = self.session.get(api_url, headers={"api_key": self.eia_api_key})
+
+            if response.status_code != 200:
+                print(f"Failed to retrieve data: {response.status_code}")
+                return None
+
+            data = _json(response)
 
-           
             try:
-                fuel_prices = [
-                    {"date": entry['period'], "price_per_gallon": entry['value']}
-                    for entry in data['response']['data']
-                ]
-                return fuel_prices
+                entries = data['response']['data']
+                pages.append(np.array(
+                    [(entry['period'], np.nan if entry['value'] is None else float(entry['value'])) for entry in entries],
+                    dtype=FUEL_PRICE_DTYPE,
+                ))
             except KeyError as e:
                 print(f"Key error: {e}")
                 return None
-        else:
-            print(f"Failed to retrieve data: {response.status_code}")
-            return None
\ No newline at end of file
+            except ValueError as e:
+                print(f"Unexpected fuel price data: {e}")
+                return None
+
+            if len(entries) < self.EIA_PAGE_LENGTH:
+                return np.concatenate(pages)
+            offset += self.EIA_PAGE_LENGTH
+
+    @staticmethod
+    def fuel_prices_to_records(fuel_prices):
+        """
+        Convertit le tableau renvoyé par get_jet_fuel_price en liste de dictionnaires (ancien format).
+
+        :param fuel_prices: The structured array returned by get_jet_fuel_price.
+        :return: A list of {"date": "YYYY-MM-DD", "price_per_gallon": float} dictionaries.
+        """
+        return [{"date": str(date), "price_per_gallon": float(price)} for date, price in fuel_prices.tolist()]
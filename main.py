@@ -23,7 +23,7 @@ quantitative, en faisant un atout inestimable pour les planificateurs de vols, l
 Mais avant tout, quelques indications pour les utilisateurs !
 
 Penser à bien installer la librairie de notre API amadeus !pip install amadeus
-Ainsi que la libraire geopy pour les routes !pip install folium geopy
+Ainsi que la libraire folium pour les cartes de routes !pip install folium
 
 Penser à bien importer les autres fichier flight_scanner.py et airlines_codes.py
 
@@ -44,10 +44,110 @@ Pour toute information, merci de contacter = n.annoncontact@gmail.com
 
 # main.py
     
-from flight_scanner import FlightScanner
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from airline_codes import airline_codes
+from flight_scanner import FlightScanner, WEEKDAYS
+
+
+CACHE_DIR = ".flycache"
+SEARCH_CACHE_TTL = 600  # secondes : au-delà, on refait la recherche auprès d'Amadeus
+ANALYTICS_KEYS = ('stats', 'weekday', 'avg_airline', 'cabins')
+
+
+def _cache_key(origin, destination, departure_date):
+    return hashlib.blake2b(f"{origin}|{destination}|{departure_date}".encode()).hexdigest()
+
+
+def cached_search_flights(scanner, origin, destination, departure_date, ttl=SEARCH_CACHE_TTL, refresh=False):
+    """
+    Recherche de vols avec un cache sur disque : relancer la même recherche pendant `ttl` secondes
+    réutilise le résultat précédent au lieu de réinterroger l'API Amadeus.
+    Renvoie les vols et la date d'enregistrement de la recherche en cache (None si elle n'a pas été mise en cache).
+    """
+    path = os.path.join(CACHE_DIR, f"{_cache_key(origin, destination, departure_date)}.json")
+    if not refresh:
+        try:
+            with open(path, encoding='utf-8') as f:
+                cached = json.load(f)
+            if time.time() - cached['stored_at'] < ttl:
+                return cached['flights'], cached['stored_at']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    flights = scanner.search_flights(origin, destination, departure_date)
+    if not flights:  # on ne met pas en cache une recherche en erreur
+        return flights, None
+    stored_at = time.time()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'stored_at': stored_at, 'flights': flights}, f)
+    return flights, stored_at
+
+
+def load_analytics(origin, destination, departure_date, stored_at):
+    """
+    Relit les résultats d'analyse enregistrés pour cette recherche, s'ils ont été calculés
+    sur la même réponse d'Amadeus (même `stored_at` que le cache des vols), seulement celles déjà calculées.
+    """
+    if stored_at is None:
+        return {}
+    path = os.path.join(CACHE_DIR, f"{_cache_key(origin, destination, departure_date)}.analytics.json")
+    try:
+        with open(path, encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['flights_stored_at'] == stored_at:
+            return {name: cached[name] for name in ANALYTICS_KEYS if name in cached}
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def save_analytics(origin, destination, departure_date, stored_at, analytics):
+    """
+    Enregistre les résultats d'analyse à côté du cache des vols, liés à sa date d'enregistrement.
+    """
+    if stored_at is None:
+        return
+    path = os.path.join(CACHE_DIR, f"{_cache_key(origin, destination, departure_date)}.analytics.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'flights_stored_at': stored_at, **analytics}, f, default=lambda value: value.tolist()) # tableaux numpy
+
+
+def _done(value):
+    """Future déjà résolu, pour traiter un résultat relu du cache comme un calcul lancé en parallèle."""
+    future = Future()
+    future.set_result(value)
+    return future
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FlyPath Arbitrage : par défaut, seules les options de vol sont affichées")
+    parser.add_argument('--stats', action='store_true', help="Statistiques de prix par compagnie et graphique (stats.png)")
+    parser.add_argument('--filter', action='store_true', help="Vols filtrés (Air France et ASL Airlines, 1 escale max) avec sièges disponibles")
+    parser.add_argument('--weekday', action='store_true', help="Prix moyen par jour de la semaine")
+    parser.add_argument('--airline', action='store_true', help="Prix moyen par compagnie aérienne")
+    parser.add_argument('--cabins', action='store_true', help="Comparaison des cabines sur les vols filtrés")
+    parser.add_argument('--itineraries', action='store_true', help="Visualisation des itinéraires filtrés (itineraries.png)")
+    parser.add_argument('--cost', action='store_true', help="Simulateur de coût de vol CDG -> ALG")
+    parser.add_argument('--all', action='store_true', help="Toutes les analyses ci-dessus")
+    parser.add_argument('--refresh', action='store_true', help="Ignore les recherches et analyses en cache et les recalcule")
+    args = parser.parse_args()
+    if args.all:
+        args.stats = args.filter = args.weekday = args.airline = args.cabins = args.itineraries = args.cost = True
+
+    if args.stats or args.itineraries:
+        import matplotlib
+        matplotlib.use('Agg') # Backend non interactif, à choisir avant d'importer pyplot : les graphiques sont enregistrés en PNG
+
     api_key = 'XXXXXX' #You need to have an amadeus API KEY https://developers.amadeus.com/self-service/apis-docs
     api_secret = 'XXXXXX' #You need to have an amadeus PRIVATE API KEY https://developers.amadeus.com/self-service/apis-docs
     api_openCage = "XXXXXX" #https://opencagedata.com/guides/how-to-create-a-new-api-key
@@ -58,12 +158,36 @@ if __name__ == "__main__":
     destination = 'ALG'  
     departure_date = '2025-03-26'
     
-    flights = scanner.search_flights(origin, destination, departure_date)
+    flights, stored_at = cached_search_flights(scanner, origin, destination, departure_date, refresh=args.refresh)
+    wanted = {'stats': args.stats, 'weekday': args.weekday, 'avg_airline': args.airline, 'cabins': args.cabins}
+    if any(wanted.values()) or args.filter or args.itineraries:
+        columns = scanner.derive_columns(flights) # Prix, compagnies et jours de départ extraits une seule fois pour toutes les analyses
+        # Filtrer les vols selon des critères spécifiques (Air France, ASL Airlines, 1 escale max), directement sur les colonnes
+        # (même résultat que scanner.filter_flights(flights, max_stops=1, airlines=['AF', '5O']))
+        mask = np.isin(columns['airline'], ['AF', '5O']) & (columns['stops'] <= 1)
+        filtered_flights = [flights[i] for i in np.flatnonzero(mask)]
+    
+    # Les analyses sont indépendantes : on lance en parallèle celles demandées (le coût de vol attend le géocodage OpenCage)
+    # pendant que le thread principal affiche les vols. Les graphiques restent sur le thread principal.
+    # Analyses déjà calculées sur cette même réponse d'Amadeus : on ne fait que les réafficher
+    analytics = {} if args.refresh else load_analytics(origin, destination, departure_date, stored_at)
+    executor = ThreadPoolExecutor(max_workers=5)
+    analyses = {
+        'stats': lambda: executor.submit(scanner.calculate_statistics, flights, columns=columns),
+        'weekday': lambda: executor.submit(scanner.analyze_prices_by_weekday_arr, flights, columns=columns),
+        'avg_airline': lambda: executor.submit(scanner.calculate_average_price_by_airline, flights, columns=columns),
+        'cabins': lambda: executor.submit(scanner.compare_cabins_vec, flights, columns=columns, mask=mask),
+    }
+    jobs = {name: _done(analytics[name]) if name in analytics else submit() for name, submit in analyses.items() if wanted[name]}
+    if args.cost:
+        # Modèle de coût précalculé pour cet avion et ce remplissage : il ne reste qu'à l'appliquer à la distance de chaque route
+        cost_fn = scanner.make_cost_estimator(aircraft_type="Airbus 737", passengers=150, bags_per_passenger=1, fuel_price_per_litre= 1.2)
+        jobs['distance'] = executor.submit(scanner.calculate_distance, "CDG", "ALG")
     
     #scanner.display_top_10_cheapest_options(flights) #Si on veut une liste des vols les moins chers
     # scanner.display_flight_options(flights) #Si on veut les infos completes
     #scanner.display_flight_options(flights, show_cabin_class=False, show_seat_availability=False) #Si on veut uniquement prix et compagnie
-    flights_options = flight_options = scanner.display_flight_options(flights, show_seat_availability=False) #Si on veut afficher sans les options de sieges dispo
+    print('\n'.join(scanner.render_flights(flights, include=('airline', 'price', 'cabin')))) #Si on veut afficher sans les options de sieges dispo
 
     #scanner.display_cabin_classes(flights) #Si on veut les infos cabine avec les sièges filtrés
     
@@ -71,8 +195,11 @@ if __name__ == "__main__":
     Si on veut les stats de vols avec graphique
     """
     
-    statistics = scanner.calculate_statistics(flights)
-    scanner.plot_statistics(statistics)
+    if args.stats:
+        import matplotlib.pyplot as plt
+        statistics = jobs['stats'].result()
+        stats_figure = plt.figure(figsize=(10, 6)) # Figure réutilisée (vidée) si on trace plusieurs fois, par ex. sur plusieurs dates
+        scanner.plot_statistics(statistics, fig=stats_figure, path='stats.png')
     
     # scanner.inspect_full_data(flights) # Si on veut toutes les données de l'API    
     
@@ -80,27 +207,32 @@ if __name__ == "__main__":
     Autres fonctions d'étude de marché
     """
 
-    filtered_flights = scanner.filter_flights(flights, max_stops=1, airlines=['AF', '5O']) #Filtrer les vols selon des critères spécifiques (Air France, ASL Airlines)
-    print("\n--- Filtered Flights (Air France and ASL Airlines) ---")
-    scanner.display_flight_options(filtered_flights)
+    if args.filter:
+        print("\n--- Filtered Flights (Air France and ASL Airlines) ---")
+        print('\n'.join(scanner.render_flights(filtered_flights, include=('airline', 'price', 'cabin', 'seats'))))
+    
+    if args.weekday:
+        print("\n--- Analyse des prix par jour de la semaine ---")
+        price_by_weekday = jobs['weekday'].result() #Analyse des prix par jour de la semaine : 7 moyennes du lundi au dimanche, NaN si aucun vol
+        sys.stdout.write(''.join(f"{day}: {price:.2f} EUR en moyenne\n" for day, price in zip(WEEKDAYS, price_by_weekday) if not np.isnan(price)))
     
-    print("\n--- Analyse des prix par jour de la semaine ---")
-    price_by_weekday = scanner.analyze_prices_by_weekday(flights) #Analyse des prix par jour de la semaine
-    for day, price in price_by_weekday.items():
-        print(f"{day}: {price:.2f} EUR en moyenne")
+    if args.airline:
+        print("\n--- Prix moyen par compagnie aérienne ---")
+        average_price_by_airline = jobs['avg_airline'].result() # Calcul du prix moyen par compagnie aérienne
+        sys.stdout.write(''.join(f"{airline_codes.get(airline, airline)}: {price:.2f} EUR en moyenne\n" for airline, price in average_price_by_airline.items())) # Nom de la compagnie, ou son code s'il est inconnu
     
-    print("\n--- Prix moyen par compagnie aérienne ---")
-    average_price_by_airline = scanner.calculate_average_price_by_airline(flights) # Calcul du prix moyen par compagnie aérienne
-    for airline, price in average_price_by_airline.items():
-        print(f"{airline}: {price:.2f} EUR en moyenne")
+    if args.cabins:
+        print("\n--- Comparaison des cabines ---")
+        cabin_comparisons = jobs['cabins'].result() #Comparaison des cabines pour les vols filtrés (scanner.compare_cabins pour le détail par option)
+        sys.stdout.write(''.join(f"{cabin}: {summary['count']} options, {summary['mean']:.2f} EUR en moyenne, {summary['min']:.2f} EUR au minimum\n" for cabin, summary in cabin_comparisons.items()))
     
-    print("\n--- Comparaison des cabines ---")
-    cabin_comparisons = scanner.compare_cabins(filtered_flights) #Comparaison des cabines pour les vols filtrés
-    for i, comparison in enumerate(cabin_comparisons, 1):
-        print(f"Option {i}: {comparison}")
+    if args.itineraries:
+        print("\n--- Visualisation des itinéraires ---") #Visualisation des itinéraires (affichage des durées des segments)
+        scanner.visualize_itineraries(filtered_flights, path='itineraries.png')
     
-    print("\n--- Visualisation des itinéraires ---") #Visualisation des itinéraires (affichage des durées des segments)
-    scanner.visualize_itineraries(filtered_flights)
+    computed = {name: jobs[name].result() for name in ANALYTICS_KEYS if name in jobs and name not in analytics}
+    if computed:
+        save_analytics(origin, destination, departure_date, stored_at, {**analytics, **computed})
     
     # print("\n--- Affichage limité à 10 options ---")
     # test = scanner.display_flight_options(flights, limit=10, show_cabin_class=True, show_seat_availability=True) #Affichage des options de vol avec une limite de résultats (par exemple, 10 résultats)
@@ -114,22 +246,16 @@ if __name__ == "__main__":
     #     scanner.plot_flight_route(flights[0]) 
     
     
-    # jet_fuel_prices = scanner.get_jet_fuel_price(start_date="2024-01-01", end_date="2024-08-16") #Ne marche pas encore totalement
+    # jet_fuel_prices = scanner.get_jet_fuel_price(start_date="2024-01-01", end_date="2024-08-16") #Ne marche pas encore totalement (gardé en cache : seules les nouvelles semaines sont téléchargées)
     # print(jet_fuel_prices)
     
     """
     Simulateur de coût de vol
     """
     
-    cost_estimate = scanner.estimate_flight_cost(
-        aircraft_type="Airbus 737",
-        passengers=150,
-        bags_per_passenger=1,
-        departure_airport="CDG",
-        arrival_airport="ALG",
-        fuel_price_per_litre= 1.2
-    )
-    
-    print(cost_estimate)
+    if args.cost:
+        cost_estimate = cost_fn(jobs['distance'].result()) # Distance calculée plus haut en parallèle des autres analyses
+        print(cost_estimate)
+    executor.shutdown()
         
         